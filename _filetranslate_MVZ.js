@@ -6,6 +6,8 @@
  * @author
  * @help This plugin uses either combined translations dictionary
  *   from `data\_combined.csv` which uses `\n` as replacer for newlines
+ *   (files written by the tool's `combine` command have a third column
+ *   and also use `\\` for backslashes before `n` or `\`)
  *   or separate translations for each data JSON from
  *   `data\{JSON name without extension}_[strings|attributes].csv`
  *   both with `source→translation→context` format.
@@ -679,6 +681,12 @@ function getXHRFile(file, callback, onerror, type) {
 	xhr.send(null);
 }
 
+// `\n` is a newline and `\\` a backslash in merged files written by the tool
+// (marked by their third column), other `\` are kept; legacy two-column rows
+// only have `\n` escaped
+const unescapeNewlines = (text) => text.replace(/\\([\\n])/g, (m, c) => c === 'n' ? '\n' : '\\');
+const unescapeLegacyNewlines = (text) => text.replace(/\\n/g, '\n');
+
 // Single dict approach is a bad idea but can work out for some simpler games
 function getMergedTranslations(path) {
 	if (!fs.existsSync((MV_MODE ? "www/" : '') + path))
@@ -691,7 +699,8 @@ function getMergedTranslations(path) {
 		const merged = csvToArray(xhr.responseText, false);
 		if (!merged) return null;
 		return Object.assign({}, ...merged.map((x) => ({
-			[x[0].replace(/\\n/g, '\n')]: x[1].replace(/\\n/g, '\n')
+			[x.length > 2 ? unescapeNewlines(x[0]) : unescapeLegacyNewlines(x[0])]:
+				x.length > 2 ? unescapeNewlines(x[1]) : unescapeLegacyNewlines(x[1])
 		})));
 	}
 	return null;
@@ -857,6 +866,23 @@ if (OVERRIDE_FONTS) {
 	}
 }
 
+// these chars shouldn't be at the start of new line and end of last
+const messageEnders = [' ', '\u3000', '\n'];
+
+// Merged translations empty the block's other text lines, which leaves trailing
+// newlines; needed with or without the word wrapper (e.g. for pre-wrapped texts)
+Window_Message.prototype.isEndOfText = function(textState) {
+	// avoid new empty box if the current one is at max lines and ending in \n-s
+	let index = textState.index;
+	const len = textState.text.length;
+	if (index >= len - 4) {
+		while (index < len && messageEnders.includes(textState.text[index]))
+			index++;
+		return index >= len;
+	}
+	return false;
+};
+
 // Word wrapper for all languages
 if (ENABLE_WORDWRAP) {
 	const _Window_Message_newLineX = Window_Message.prototype.newLineX;
@@ -875,26 +901,12 @@ if (ENABLE_WORDWRAP) {
 			//return this._texts.join('\n').trim();
 		//};
 
-		// these chars shouldn't be at the start of new line and end of last
-		const messageEnders = [' ', '\u3000', '\n'];
 		// keep the follwing messages one space right if they start with this:
 		const openChars = ['(', '[', '*'];
 		const closeChars = [')', ']', '*'];
 		const openCharsJP = ['「', '『'];
 		const closeCharsJP = ['」', '』'];
 
-		Window_Message.prototype.isEndOfText = function(textState) {
-			// avoid new empty box if the current one is at max lines and ending in \n-s
-			let index = textState.index;
-			const len = textState.text.length;
-			if (index >= len - 4) {
-				while (index < len && messageEnders.contains(textState.text[index]))
-					index++;
-				return index >= len;
-			}
-			return false;
-		};
-
 		let g_keepSpaces = false;
 		let g_keepSpacesJP = false;
 		let g_openCharIndex = -1;
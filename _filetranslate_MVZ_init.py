@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
-import json, os, re, argparse, csv, difflib
+import json, os, re, io, sys, argparse, csv, difflib, zipfile, unicodedata, heapq, tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
 from types import NoneType
 from hashlib import sha1
 
-GLOBAL_NAMES = []
-MZ_MODE = not os.path.isdir(".\\www")
+MZ_MODE = not os.path.isdir(os.path.join('.', 'www'))
 LINE_MERGE_CHARACTER = '' #'\n' # NOTE: set to '\n' to create multiline originals
 ADD_EVENT_NAMES = False # NOTE: usually this is not needed, so JIC
 REMOVE_TL_LINEBREAKS = ' ' # NOTE: set this to None to keep TL linebreaks as is
@@ -18,7 +20,11 @@ MZ_PLUGIN_DATA = {
 }
 
 RPGM_LIKELY_TAGS = re.compile(r"(?:^【[^】]+】)|<[^>]+>|\\{1,2}(?:[\.!a-zA-Z{}]{1,3}\[[^\]]+\]\]?|>\s+|>(?!\s+)|(?:\b[<\^\|\.n\{\}]+\b))|[※↑↓■□▼◆○●★☆♥♡♪❤〇「」『』「」【】]+|[ \t]{2,}|%\d+|\\{1,2}[\w\.\*!\|}{]|\[[^\]]+\]")
-TAGS_FILENAME = ".\\replacement_tags.csv"
+TAGS_FILENAME = "replacement_tags.csv"
+DATA_FOLDERS = (os.path.join('www', 'data'), 'data', os.path.join('package.nw', 'www', 'data'), os.path.join('package.nw', 'data'))
+COMPARE_FOLDER = 'to_compare'
+DATABASE_FILES_RE = re.compile(r'Armors|Items|Weapons|Classes|Skills|Enemies|States')
+MAP_FILE_RE = re.compile(r'Map\d+')
 
 
 # filetranslate functions to remove the dependency
@@ -62,11 +68,15 @@ def preprocess_out(lst, replace_cr):
         else:
             yield row
 
+def read_csv_rows(f, ftype=DIALECT_TRANSLATION, replace_cr=USE_CR_REPLACER):
+    """ Reads CSV array in a->b->... format from an opened text file """
+    return list(x for x in csv.reader(preprocess_in(f, replace_cr), dialect=ftype) if len(x) > 0)
+
 def read_csv_list(fn, ftype=DIALECT_TRANSLATION, replace_cr=USE_CR_REPLACER):
     """ Reads CSV array in a->b->... format """
     if os.path.isfile(fn):
         with open(fn, 'r', newline='', encoding=CSV_ENCODING) as f:
-            return list(x for x in csv.reader(preprocess_in(f, replace_cr), dialect=ftype) if len(x) > 0)
+            return read_csv_rows(f, ftype, replace_cr)
     else:
         return list()
 
@@ -87,6 +97,7 @@ def read_csv_dict(fn, ftype=DIALECT_TRANSLATION, replace_cr=USE_CR_REPLACER):
     else:
         return dict()
 
+@lru_cache(maxsize=None)
 def tag_hash(string, str_enc="utf-8", hash_len=7, use_digits=False, lang='JA'):
     """ Generates short English tags for MTL from any kind of string.
     """
@@ -164,14 +175,255 @@ def extract_quoted_strings(script_text):
     return extracted_text
 
 
+# offline word-wrapping, mirrors the plugin's `Enable Wordwrap` behaviour
+
+WRAP_WINDOW_WIDTH = 780 # message window contents width (MV: 816 - 2 * 18, MZ: 808 - 2 * 12 = 784)
+WRAP_TEXT_MARGIN = 10 # plugin's `Text Margin`
+WRAP_FACE_OFFSET = 168 # line start when a face image is shown (MV: 168, MZ: 164)
+WRAP_IGNORED_CHARS = "♥♡♪;”’!！?？)）〕]］｝」』＞》】,，、.．。　" # plugin's `Ignored Characters`
+WRAP_CHAR_WIDTHS = {
+#   "Language code": {"default": half-width char, "wide": full-width char, "<char>": its width} in pixels
+    '': {'default': 14, 'wide': 28},
+    '_jp': {'default': 14, 'wide': 28},
+}
+WRAP_CODE_WIDTHS = {'I': 36, 'N': 112, 'P': 112, 'V': 56} # estimated widths of \I[n] icons and \N[n] etc. values
+WRAP_TOKENS_RE = re.compile(r'\\([A-Za-z]+)(?:\[[^\]]*\])?|\\.|.', re.S)
+WRAP_LINEBREAK_RE = re.compile(r' *\n *')
+WRAP_PARAGRAPH_RE = re.compile(r'(\n[ \t]*\n\s*)') # blank lines are hard breaks
+
+@dataclass
+class WrapConfig:
+    """ Offline word-wrapping settings for 401/405 translations """
+    language: str = ''
+    window_width: int = WRAP_WINDOW_WIDTH
+    margin: int = WRAP_TEXT_MARGIN
+    face_offset: int = WRAP_FACE_OFFSET
+    ignored_chars: str = WRAP_IGNORED_CHARS
+    char_widths: dict = field(default_factory=lambda: WRAP_CHAR_WIDTHS)
+
+    def max_width(self, has_face):
+        return self.window_width - self.margin - (self.face_offset if has_face else self.margin)
+
+def is_wide_char(char):
+    return unicodedata.east_asian_width(char) in ('F', 'W')
+
+def wrap_units(text, widths, ignored_chars):
+    """ Splits text into unbreakable units of [text, width, kind, tokens] where kind is
+        'space', 'wide' or 'narrow' and tokens are (text, width) parts for mid-word breaks.
+    """
+    units = []
+    for m in WRAP_TOKENS_RE.finditer(text):
+        token = m.group(0)
+        if m.group(1):
+            kind, width = 'narrow', WRAP_CODE_WIDTHS.get(m.group(1).upper(), 0)
+        elif token[0] == '\\':
+            kind, width = 'narrow', 0
+        elif token == ' ':
+            kind, width = 'space', widths.get(' ', widths['default'])
+        elif is_wide_char(token):
+            kind, width = 'wide', widths.get(token, widths.get('wide', 2 * widths['default']))
+        else:
+            kind, width = 'narrow', widths.get(token, widths['default'])
+        if (kind == 'narrow' and units and units[-1][2] == 'narrow') or (
+                # can't start a line so glue it to the previous unit
+                kind == 'wide' and token in ignored_chars and units and units[-1][2] != 'space'):
+            units[-1][0] += token
+            units[-1][1] += width
+            units[-1][3].append((token, width))
+        else:
+            units.append([token, width, kind, [(token, width)]])
+    return units
+
+def wrap_text(text, max_width, widths, ignored_chars=WRAP_IGNORED_CHARS):
+    """ Inserts line breaks so that each line fits into max_width pixels;
+        like the plugin, words wider than a line are broken by character.
+    """
+    lines = []
+    for paragraph in text.split('\n'):
+        line, line_width = '', 0
+        spaces, spaces_width = '', 0
+        prev_kind = None
+        for unit_text, width, kind, tokens in wrap_units(paragraph, widths, ignored_chars):
+            if kind == 'space':
+                spaces += unit_text
+                spaces_width += width
+                continue
+            can_break = (spaces or kind == 'wide' or prev_kind == 'wide') and unit_text[0] not in ignored_chars
+            if width > max_width:
+                if line and can_break:
+                    lines.append(line)
+                    line, line_width = '', 0
+                else:
+                    line += spaces
+                    line_width += spaces_width
+                for token, token_width in tokens:
+                    if line and line_width + token_width > max_width:
+                        lines.append(line)
+                        line, line_width = '', 0
+                    line += token
+                    line_width += token_width
+            elif line and can_break and line_width + spaces_width + width > max_width:
+                lines.append(line)
+                line, line_width = unit_text, width
+            else:
+                line += spaces + unit_text
+                line_width += spaces_width + width
+            spaces, spaces_width = '', 0
+            prev_kind = kind
+        lines.append(line)
+    return '\n'.join(lines)
+
+def reflow_text(text):
+    """ Joins soft line breaks of a paragraph, without a space next to full-width characters """
+    def join_lines(m):
+        before = text[m.start() - 1] if m.start() > 0 else ' '
+        after = text[m.end()] if m.end() < len(text) else ' '
+        return '' if is_wide_char(before) or is_wide_char(after) else ' '
+    return WRAP_LINEBREAK_RE.sub(join_lines, text)
+
+def wrap_translation(text, has_face, wrap):
+    """ Re-flows previously wrapped translation text and wraps it for the message window;
+        blank lines separate paragraphs and are kept as is.
+    """
+    if not text: return text
+    widths = wrap.char_widths.get(wrap.language) or wrap.char_widths['']
+    parts = WRAP_PARAGRAPH_RE.split(text)
+    for i in range(0, len(parts), 2):
+        parts[i] = wrap_text(reflow_text(parts[i]), wrap.max_width(has_face), widths, wrap.ignored_chars)
+    return ''.join(parts)
+
+def load_char_widths(file_name):
+    """ Reads a JSON language width table like WRAP_CHAR_WIDTHS and merges it with the built-in one """
+    char_widths = {lang: dict(widths) for lang, widths in WRAP_CHAR_WIDTHS.items()}
+    if file_name:
+        with open(file_name, 'r', encoding=CSV_ENCODING) as f:
+            for lang, widths in json.load(f).items():
+                char_widths.setdefault(lang, {'default': 14}).update(widths)
+    return char_widths
+
+
+# data folder access
+
+def split_archive_path(path):
+    """ Splits path into (zip archive, folder inside it) if any of its parents is a zip file;
+        returns (None, path) for plain folders.
+    """
+    parts = re.split(r'[\\/]+', path)
+    for i in range(1, len(parts) + 1):
+        prefix = os.sep.join(parts[:i]) or os.sep
+        if os.path.isfile(prefix):
+            if zipfile.is_zipfile(prefix):
+                return prefix, '/'.join(p for p in parts[i:] if p not in ('', '.'))
+            break
+        if not os.path.exists(prefix):
+            break
+    return None, path
+
+class DataFolder:
+    """ Read-only view of a folder on disk or a folder inside a zip archive
+        like `package.nw/www/data`, so the files don't need unpacking.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.archive_path, self.member_path = split_archive_path(path)
+        self.archive = zipfile.ZipFile(self.archive_path) if self.archive_path else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.archive:
+            self.archive.close()
+            self.archive = None
+
+    def _member(self, name):
+        return f"{self.member_path}/{name}" if self.member_path else name
+
+    def exists(self):
+        if self.archive is None:
+            return os.path.isdir(self.path)
+        prefix = self._member('')
+        return not prefix or any(n.startswith(prefix) for n in self.archive.namelist())
+
+    def listdir(self):
+        if self.archive is None:
+            return os.listdir(self.path) if os.path.isdir(self.path) else []
+        prefix = self._member('')
+        names = []
+        for n in self.archive.namelist():
+            rest = n[len(prefix):] if n.startswith(prefix) else ''
+            if rest and '/' not in rest:
+                names.append(rest)
+        return names
+
+    def isfile(self, name):
+        if self.archive is None:
+            return os.path.isfile(os.path.join(self.path, name))
+        try:
+            self.archive.getinfo(self._member(name))
+            return True
+        except KeyError:
+            return False
+
+    def open(self, name, encoding=CSV_ENCODING):
+        """ Opens a file for text reading; archive members are decompressed on the fly """
+        if self.archive is None:
+            return open(os.path.join(self.path, name), 'r', newline='', encoding=encoding)
+        return io.TextIOWrapper(self.archive.open(self._member(name)), encoding=encoding, newline='')
+
+def load_json(folder, file_name):
+    with folder.open(file_name) as file:
+        jsondata = file.read()
+    try:
+        return json.loads(jsondata)
+    except Exception as e:
+        e_pos = e.pos
+        start = max(0, e_pos - 32)
+        end = e_pos + 32
+        context = jsondata[start:end]
+        print(f"Error in {file_name} at position {e_pos}: <{context}>':\n{e}")
+        raise
+
+
 # main processing functions
 
+class TextEntry:
+    """ Extracted source→translation[→context] row; iterates over its CSV columns
+        so it can be written directly. The context is an interned property or speaker
+        name, optionally followed by a suffix shared by all rows of the same object.
+    """
+    __slots__ = ('source', 'translation', 'context', 'suffix', 'has_face')
+
+    def __init__(self, source, translation='', context=None, has_face=False, suffix=''):
+        self.source = source
+        self.translation = translation
+        self.context = sys.intern(context) if isinstance(context, str) else context
+        self.suffix = suffix
+        self.has_face = has_face # only used for offline word-wrapping, not written
+
+    def __iter__(self):
+        yield self.source
+        yield self.translation
+        if self.context is not None:
+            yield self.context + self.suffix if self.suffix else self.context
+
+    def __len__(self):
+        return 2 if self.context is None else 3
+
+    def __repr__(self):
+        return f"TextEntry{tuple(self)!r}"
+
+
 def get_next_code(command_list, i):
     return None if i+1 >= len(command_list) else command_list[i+1]['code']
 
-def parse_codes(original_page, translated_page, name, no_rare_codes, stop_words, merge_lines):
+def parse_codes(original_page, translated_page, name, no_rare_codes, stop_words, merge_lines, global_names=()):
     text_entries = []
     attributes = {}
+    face_name = ''
     has_original = 'list' in original_page
     has_compare_translation = 'list' in translated_page if translated_page else False
     parsed_codes = (101, 102, 108, 122, 355, 356, 357, 401, 405, 408, 655)
@@ -223,9 +475,9 @@ def parse_codes(original_page, translated_page, name, no_rare_codes, stop_words,
                         break
 
             if code == 101:  # Show Text
-                name = params[0]
-                if GLOBAL_NAMES:
-                    global_name = GLOBAL_NAMES[params[1]] if params[1] < len(GLOBAL_NAMES) else name
+                name = face_name = params[0]
+                if global_names:
+                    global_name = global_names[params[1]] if params[1] < len(global_names) else name
             elif code == 102:  # Show Choices
                 for choice in params[0]:
                     if choice and isinstance(choice, str):
@@ -240,6 +492,7 @@ def parse_codes(original_page, translated_page, name, no_rare_codes, stop_words,
                             attributes[s] = tr_s
             elif code in (401, 405):  # Text data
                 current_lines, end_index = get_full_text(command_list, i)
+                has_face = code == 401 and bool(face_name)
                 if has_compare_translation and tr_params:
                     tr_current_lines, _ = get_full_text(tr_command_list, tr_index)
                 else:
@@ -251,14 +504,14 @@ def parse_codes(original_page, translated_page, name, no_rare_codes, stop_words,
                     if current_text:
                         if REMOVE_TL_LINEBREAKS is not None:
                             tr_current_text = tr_current_text.replace('\n', REMOVE_TL_LINEBREAKS)
-                        text_entries.append([current_text, tr_current_text, global_name])
+                        text_entries.append(TextEntry(current_text, tr_current_text, global_name, has_face))
                     i = end_index
                 else:
                     for current_line, tr_current_line in zip(current_lines, tr_current_lines):
                         if current_line:
                             if REMOVE_TL_LINEBREAKS is not None:
                                 tr_current_line = tr_current_line.replace('\n', REMOVE_TL_LINEBREAKS)
-                            text_entries.append([current_line, tr_current_line, global_name])
+                            text_entries.append(TextEntry(current_line, tr_current_line, global_name, has_face))
                     i += len(current_lines)
                 continue
             elif code in (355, 655):  # Script code
@@ -302,7 +555,7 @@ def parse_codes(original_page, translated_page, name, no_rare_codes, stop_words,
             i += 1
     return text_entries, attributes
 
-def parse_pages(original_event, translated_event, no_rare_codes, stop_words, merge_lines=False):
+def parse_pages(original_event, translated_event, no_rare_codes, stop_words, merge_lines=False, global_names=()):
     def page_to_hashable(page):
         return (
             tuple(page.get('conditions', {}).values()),
@@ -331,7 +584,7 @@ def parse_pages(original_event, translated_event, no_rare_codes, stop_words, mer
                             i - i1 + j1 < len(translated_event['pages'])) else {}
                         strs, attrs = parse_codes(
                             original_page, translated_page, character_name,
-                            no_rare_codes, stop_words, merge_lines
+                            no_rare_codes, stop_words, merge_lines, global_names
                         )
                         strings.extend(strs)
                         attributes |= attrs
@@ -340,7 +593,7 @@ def parse_pages(original_event, translated_event, no_rare_codes, stop_words, mer
                         translated_page = translated_event['pages'][j]
                         strs, attrs = parse_codes(
                             translated_page, [], character_name,
-                            no_rare_codes, stop_words, merge_lines
+                            no_rare_codes, stop_words, merge_lines, global_names
                         )
                         strings.extend(strs)
                         attributes |= attrs
@@ -348,7 +601,7 @@ def parse_pages(original_event, translated_event, no_rare_codes, stop_words, mer
             for original_page in original_event['pages']:
                 strs, attrs = parse_codes(
                     original_page, {}, character_name,
-                    no_rare_codes, stop_words, merge_lines
+                    no_rare_codes, stop_words, merge_lines, global_names
                 )
                 strings.extend(strs)
                 attributes |= attrs
@@ -364,7 +617,7 @@ def event_to_hashable(event):
         tuple(page.get('conditions', {}).get('switch1Id', -1) for page in event.get('pages', []))
     )
 
-def parse_events_list(original_data, translated_data, no_rare_codes, stop_words, merge_lines=False):
+def parse_events_list(original_data, translated_data, no_rare_codes, stop_words, merge_lines=False, global_names=()):
     strings = []
     attributes = {}
 
@@ -386,12 +639,12 @@ def parse_events_list(original_data, translated_data, no_rare_codes, stop_words,
                     if "pages" in original_event:
                         strs, attrs = parse_pages(
                             original_event, translated_event, 
-                            no_rare_codes, stop_words, merge_lines
+                            no_rare_codes, stop_words, merge_lines, global_names
                         )
                     else:
                         strs, attrs = parse_codes(
                             original_event, translated_event, original_event['name'],
-                            no_rare_codes, stop_words, merge_lines
+                            no_rare_codes, stop_words, merge_lines, global_names
                         )
                     if ADD_EVENT_NAMES and "name" in original_event:
                         attributes |= {original_event["name"]: translated_event["name"]}
@@ -404,12 +657,12 @@ def parse_events_list(original_data, translated_data, no_rare_codes, stop_words,
                     if "pages" in original_event:
                         strs, attrs = parse_pages(
                             original_event, {}, no_rare_codes,
-                            stop_words, merge_lines
+                            stop_words, merge_lines, global_names
                         )
                     else:
                         strs, attrs = parse_codes(
                             translated_event, {}, translated_event['name'], 
-                            no_rare_codes, stop_words, merge_lines
+                            no_rare_codes, stop_words, merge_lines, global_names
                         )
                     strings.extend(strs)
                     if ADD_EVENT_NAMES and "name" in translated_event:
@@ -420,12 +673,12 @@ def parse_events_list(original_data, translated_data, no_rare_codes, stop_words,
             if not original_event: continue
             if "pages" in original_event:
                 strs, attrs = parse_pages(
-                    original_event, {}, no_rare_codes, stop_words, merge_lines
+                    original_event, {}, no_rare_codes, stop_words, merge_lines, global_names
                 )
             else:
                 strs, attrs = parse_codes(
                     original_event, {}, original_event['name'],
-                    no_rare_codes, stop_words, merge_lines
+                    no_rare_codes, stop_words, merge_lines, global_names
                 )
             if ADD_EVENT_NAMES and "name" in original_event:
                 attributes |= {original_event["name"]:''}
@@ -435,7 +688,7 @@ def parse_events_list(original_data, translated_data, no_rare_codes, stop_words,
     return strings, attributes
 
 def parse_map_events(
-        original_data, translated_data, no_rare_codes, stop_words, merge_lines=False):
+        original_data, translated_data, no_rare_codes, stop_words, merge_lines=False, global_names=()):
     strings = []
     attributes = {}
 
@@ -456,7 +709,7 @@ def parse_map_events(
                                 'events' in translated_data) and i - i1 + j1 < len(
                                 translated_data['events']) else None
                             strs, attrs = parse_pages(original_event, translated_event, no_rare_codes,
-                                                      stop_words, merge_lines)
+                                                      stop_words, merge_lines, global_names)
                             if ADD_EVENT_NAMES and "name" in original_event:
                                 attributes |= {original_event["name"]: translated_event["name"]}
                             strings.extend(strs)
@@ -467,7 +720,7 @@ def parse_map_events(
                             'events' in translated_data) and j < len(
                             translated_data['events']) else None
                         strs, attrs = parse_pages(translated_event, None, no_rare_codes,
-                                                  stop_words, merge_lines)
+                                                  stop_words, merge_lines, global_names)
                         if ADD_EVENT_NAMES and "name" in translated_event:
                             attributes |= {translated_event["name"]: ''}
                         strings.extend(strs)
@@ -476,7 +729,7 @@ def parse_map_events(
             for original_event in original_data['events']:
                 if original_event:
                     strs, attrs = parse_pages(original_event, None, no_rare_codes,
-                                              stop_words, merge_lines)
+                                              stop_words, merge_lines, global_names)
                     if ADD_EVENT_NAMES and "name" in original_event:
                         attributes |= {original_event["name"]:''}
                     strings.extend(strs)
@@ -484,13 +737,20 @@ def parse_map_events(
 
     return strings, attributes
 
+def comment_suffix(obj):
+    """ Builds the `/name/id` part of database object comments once per object """
+    suffix = f"/{obj['name']}" if 'name' in obj else ''
+    if 'id' in obj:
+        suffix += f"/{obj['id']}"
+    return suffix
+
 def parse_array_attributes(obj, tr_obj, attrs=[], no_rare_codes=False, dump_all=False):
     attributes = {}
     if dump_all:
         for i in obj:
             if obj[i]:
                 tr_value = tr_obj.get(i, '') if tr_obj else ''
-                attributes[obj[i]] = [tr_value, i]
+                attributes[obj[i]] = TextEntry(obj[i], tr_value, i)
     else:
         for prop in attrs:
             if no_rare_codes and prop == 'note': continue
@@ -498,7 +758,7 @@ def parse_array_attributes(obj, tr_obj, attrs=[], no_rare_codes=False, dump_all=
                 for i, value in enumerate(obj[prop]):
                     if value:
                         tr_value = tr_obj.get(prop, [])[i] if tr_obj and prop in tr_obj else ''
-                        attributes[value] = [tr_value, prop]
+                        attributes[value] = TextEntry(value, tr_value, prop)
     return attributes
 
 def parse_attributes(data, tr_data, attrs=[], no_rare_codes=False, is_list=False, all=False):
@@ -519,214 +779,457 @@ def parse_attributes(data, tr_data, attrs=[], no_rare_codes=False, is_list=False
                     obj = data[i]
                     tr_obj = tr_data[i - i1 + j1] if i - i1 + j1 < len(tr_data) else {}
                     if not obj: continue
+                    suffix = comment_suffix(obj)
                     for prop in attrs:
-                        comment = prop
                         if prop == 'note':
                             if no_rare_codes: continue
-                        if 'name' in obj:
-                            comment += f"/{obj['name']}"
-                        if 'id' in obj:
-                            comment += f"/{obj['id']}"
                         if prop in obj and obj[prop]:
                             tr_value = tr_obj.get(prop, '') if tr_obj else ''
-                            attributes[obj[prop]] = [tr_value, comment]
+                            attributes[obj[prop]] = TextEntry(obj[prop], tr_value, prop, suffix=suffix)
     else:
         for obj in data:
             if not obj: continue
+            suffix = comment_suffix(obj)
             for prop in attrs:
-                comment = prop
                 if prop == 'note':
                     if no_rare_codes: continue
-                if 'name' in obj:
-                    comment += f"/{obj['name']}"
-                if 'id' in obj:
-                    comment += f"/{obj['id']}"
                 if prop in obj and obj[prop]:
-                    attributes[obj[prop]] = ['', comment]
+                    attributes[obj[prop]] = TextEntry(obj[prop], '', prop, suffix=suffix)
 
     return attributes
 
 def load_translations(translations_folder):
     translations = {}
-    if os.path.exists(translations_folder):
-        for file_name in os.listdir(translations_folder):
+    with DataFolder(translations_folder) as folder:
+        for file_name in folder.listdir():
             if file_name.endswith('.json'):
-                file_path = os.path.join(translations_folder, file_name)
-                with open(file_path, 'r', encoding='utf-8-sig') as file:
-                    jsondata = file.read()
-                    try:
-                        translations[file_name] = json.loads(jsondata)
-                    except Exception as e:
-                        e_pos = e.pos
-                        start = max(0, e_pos - 32)
-                        end = e_pos + 32
-                        context = jsondata[start:end]
-                        print(f"Error in {file_name} at position {e_pos}: <{context}>':\n{e}")
-                        raise
+                translations[file_name] = load_json(folder, file_name)
     return translations
 
-def create_csv_files(input_folder, output_folder, no_rare_codes, stop_words,
-                     merge_lines, translation_folder, find_changed_sources):
+@dataclass
+class ExtractConfig:
+    """ Settings of a single game extraction """
+    input_folder: str
+    output_folder: str = None # if set, existing CSV translations from there are carried over
+    translations_folder: str = None
+    no_rare_codes: bool = True
+    stop_words: list = field(default_factory=list)
+    merge_lines: bool = True
+    find_changed_sources: bool = TRY_FIND_SIMILAR
+    tags_filename: str = None
+    wrap: WrapConfig = None # pre-wrap 401/405 translations so the plugin's word-wrapping can be disabled
+
+@dataclass
+class FileResult:
+    strings: list = field(default_factory=list)
+    attributes: list = field(default_factory=list)
+    tags: dict = field(default_factory=dict)
+
+@dataclass
+class ExtractResult:
+    files: dict = field(default_factory=dict) # JSON file name -> FileResult
+
+    @property
+    def tags(self):
+        string_tags = {}
+        for file_result in self.files.values():
+            string_tags.update(file_result.tags)
+        return string_tags
+
+def extract_files(config):
+    """ Extracts strings, attributes and replacement tags of data files one by one,
+        yielding (file name, FileResult) pairs as soon as each file is parsed.
+    """
     pretranslated_dict = {}
-    string_tags = {}
-    global GLOBAL_NAMES
-
-    def write_attributes(name, data, pretranslated_dict):
-        if data:
-            csv_name = os.path.splitext(name)[0] + '_attributes.csv'
-            csv_path = os.path.join(output_folder, csv_name)
-            attrs = [[k, v[0], v[1]] if isinstance(v, list) else [k, v] for k, v in data.items() if k]
-            existing_data = read_csv_dict(csv_path) # read the existing translations
-            pretranslated_dict.update(existing_data)
-            for i, row in enumerate(attrs):
-                if row[0] in pretranslated_dict:
-                    attrs[i][1] = pretranslated_dict[row[0]]
-            write_csv_list(csv_path, attrs)
-            print(f" Created {os.path.relpath(csv_path)} with {len(attrs)} attributes")
-
-    pretranslated = read_csv_list(os.path.join(input_folder, '_combined.csv'))
-    for row in pretranslated:
-        texts = row[0].split('\\n')
-        text_tls = row[1].split('\\n')
-        for i, line in enumerate(texts):
-            pretranslated_dict[line] = text_tls[i] if i < len(text_tls) else ''
-    if not pretranslated:
-        pretranslated = {}
-
-    translated_fully = load_translations(translation_folder)
-    if not translated_fully:
-        translated_fully = {}
-
-    file_path = os.path.join(input_folder, 'Actors.json')
-    if os.path.isfile(file_path):
-        with open(file_path, 'r', encoding='utf-8-sig') as file:
-            try:
-                data = json.load(file)
-            except Exception as e:
-                print(f"Error in {file_name}!!\n{e}")
-                raise
+    global_names = []
+
+    def existing_csv(name, suffix):
+        if not config.output_folder: return None
+        return os.path.join(config.output_folder, os.path.splitext(name)[0] + suffix)
+
+    def reconcile_attributes(name, data):
+        attrs = [v if isinstance(v, TextEntry) else TextEntry(k, v) for k, v in data.items() if k]
+        csv_path = existing_csv(name, '_attributes.csv')
+        if csv_path:
+            pretranslated_dict.update(read_csv_dict(csv_path)) # read the existing translations
+        for row in attrs:
+            if row.source in pretranslated_dict:
+                row.translation = pretranslated_dict[row.source]
+        return attrs
+
+    def reconcile_strings(name, strs):
+        string_tags = {}
+        for row in strs:
+            if row.source in pretranslated_dict:
+                row.translation = pretranslated_dict[row.source]
+
+        csv_path = existing_csv(name, '_strings.csv')
+        strs_old = read_csv_list(csv_path) if csv_path else [] # read the old existing string translation
+        strs_old_set = set(s[0] for s in strs_old)
+        for row_i in strs:
+            for tag in RPGM_LIKELY_TAGS.findall(row_i.source):
+                if tag not in string_tags:
+                    string_tags[tag] = tag_hash(tag)
+            if row_i.source not in strs_old_set: continue
+            for j, row_j in enumerate(strs_old):
+                if row_i.source == row_j[0]:
+                    row_i.translation = row_j[1]
+                    strs_old.pop(j)
+                    break
+        if config.find_changed_sources:
+            for row_i in strs:
+                if not row_i.translation:
+                    best_match = None
+                    best_score = 0
+                    best_index = -1
+                    for j, row_j in enumerate(strs_old):
+                        score = similarity_score(row_i.source, row_j[0])
+                        if score > best_score:
+                            best_match = row_j
+                            best_score = score
+                            best_index = j
+                    if best_match and best_score > 80:
+                        row_i.translation = best_match[1]
+                        strs_old.pop(best_index)
+        if config.wrap:
+            for row in strs:
+                row.translation = wrap_translation(row.translation, row.has_face, config.wrap)
+        return strs, string_tags
+
+    with DataFolder(config.input_folder) as input_data:
+        if not input_data.exists():
+            raise FileNotFoundError(f"input folder {config.input_folder} not found")
+        if input_data.isfile('_combined.csv'):
+            with input_data.open('_combined.csv') as f:
+                pretranslated = read_csv_rows(f)
+        else:
+            pretranslated = []
+        for row in pretranslated:
+            row = normalize_combined_row(row)
+            texts = unescape_newlines(row[0]).split('\n')
+            text_tls = unescape_newlines(row[1]).split('\n')
+            for i, line in enumerate(texts):
+                pretranslated_dict[line] = text_tls[i] if i < len(text_tls) else ''
+
+        translated_fully = load_translations(config.translations_folder) if config.translations_folder else {}
+
+        if input_data.isfile('Actors.json'):
+            data = load_json(input_data, 'Actors.json')
             tr_data = translated_fully.get('Actors.json', [])
             attrs = parse_attributes(
                 data, tr_data,
                 ['name', 'nickname', 'profile', 'note', 'description',
                 'message1', 'message2', 'message3', 'message4'])
-            GLOBAL_NAMES = [n for n in parse_attributes(data, tr_data, ['name']).keys()]
-            write_attributes('Actors.json', attrs, pretranslated_dict)
-
-    for file_name in os.listdir(input_folder):
-        if file_name.endswith('.json') and file_name != 'Actors.json':
-            print(f"Parsing {file_name}...")
-            file_path = os.path.join(input_folder, file_name)
-            if "Actors" in file_path: continue
-            if not os.path.isfile(file_path): continue
-            with open(file_path, 'r', encoding='utf-8-sig') as file:
-                jsondata = file.read()
-                try:
-                    data = json.loads(jsondata)
-                except Exception as e:
-                    e_pos = e.pos
-                    start = max(0, e_pos - 32)
-                    end = e_pos + 32
-                    context = jsondata[start:end]
-                    print(f"Error in {file_name} at position {e_pos}: <{context}>':\n{e}")
-                    raise
-
-            tr_data = translated_fully.get(file_name, {})
-            strs = attrs = None
-
-            # Determine the type of data and extract relevant information
-            if "Armors" in file_path or "Items" in file_path or "Weapons" in file_path or \
-            "Classes" in file_path or "Skills" in file_path or "Enemies" in file_path or "States" in file_path:
-                # Basic database objects (Actors, Armors, etc.)
-                attrs = parse_attributes(
-                    data, tr_data,
-                    ['name', 'nickname', 'profile', 'note', 'description',
-                     'message1', 'message2', 'message3', 'message4'])
-            elif "System" in file_path:
-                # System data
-                attrs = parse_attributes([data], [tr_data], ['gameTitle'])
-                attrs |= parse_array_attributes(
-                    data, tr_data,
-                    ['armorTypes', 'elements', 'equipTypes',
-                     'skillTypes', 'weaponTypes']
-                )
-                attrs |= parse_array_attributes(data['terms'], tr_data.get(
-                    'terms', {}), ['basic', 'commands', 'params'])
-                attrs |= parse_array_attributes(data['terms']['messages'], tr_data.get(
-                    'terms', {}).get('messages', {}), dump_all=True)
-            elif "Troops" in file_path:
-                # Troop data
-                strs, attrs = parse_events_list(data, tr_data, False, stop_words, merge_lines)
-            elif "Events" in file_path:
-                # Event data
-                strs, attrs = parse_events_list(data, tr_data, no_rare_codes, stop_words, merge_lines)
-            elif re.compile(r'Map\d+').search(file_path):
-                # Map data
-                attrs = {data['displayName']: tr_data.get('displayName', '')}
-                strs, attrs1 = parse_map_events(data, tr_data, no_rare_codes, stop_words, merge_lines)
-                attrs |= attrs1
-
-            # Create strings CSV
-            if strs:
-                csv_name = os.path.splitext(file_name)[0] + '_strings.csv'
-                csv_path = os.path.join(output_folder, csv_name)
-                for i, row in enumerate(strs):
-                    if row[0] in pretranslated_dict:
-                        strs[i][1] = pretranslated_dict[row[0]]
-
-                strs_old = read_csv_list(csv_path) # read the old existing string translation
-                strs_old_set = set(s[0] for s in strs_old)
-                for i, row_i in enumerate(strs):
-                    for tag in RPGM_LIKELY_TAGS.findall(row_i[0]):
-                        if tag not in string_tags:
-                            string_tags[tag] = tag_hash(tag)
-                    if row_i[0] not in strs_old_set: continue
-                    for j, row_j in enumerate(strs_old):
-                        if row_i[0] == row_j[0]:
-                            strs[i][1] = row_j[1]
-                            strs_old.pop(j)
-                            break
-                if find_changed_sources:
-                    for i, row_i in enumerate(strs):
-                        if not strs[i][1]:
-                            best_match = None
-                            best_score = 0
-                            best_index = -1
-                            for j, row_j in enumerate(strs_old):
-                                score = similarity_score(row_i[0], row_j[0])
-                                if score > best_score:
-                                    best_match = row_j
-                                    best_score = score
-                                    best_index = j
-                            if best_match and best_score > 80:
-                                strs[i][1] = best_match[1]
-                                strs_old.pop(best_index)
-
-                write_csv_list(csv_path, strs)
-                print(f" Created {os.path.relpath(csv_path)} with {len(strs)} strings")
-            # Create attributes CSV
-            write_attributes(file_name, attrs, pretranslated_dict)
-
-    if len(string_tags) > 0:
-        with open(TAGS_FILENAME, 'w', newline='', encoding=CSV_ENCODING) as f:
+            global_names = [n for n in parse_attributes(data, tr_data, ['name']).keys()]
+            if attrs:
+                yield 'Actors.json', FileResult(attributes=reconcile_attributes('Actors.json', attrs))
+
+        for file_name in input_data.listdir():
+            if file_name.endswith('.json') and file_name != 'Actors.json':
+                print(f"Parsing {file_name}...")
+                if "Actors" in file_name: continue
+                if not input_data.isfile(file_name): continue
+                data = load_json(input_data, file_name)
+
+                tr_data = translated_fully.get(file_name, {})
+                strs = attrs = None
+                no_rare_codes, stop_words, merge_lines = config.no_rare_codes, config.stop_words, config.merge_lines
+
+                # Determine the type of data and extract relevant information
+                if DATABASE_FILES_RE.search(file_name):
+                    # Basic database objects (Actors, Armors, etc.)
+                    attrs = parse_attributes(
+                        data, tr_data,
+                        ['name', 'nickname', 'profile', 'note', 'description',
+                         'message1', 'message2', 'message3', 'message4'])
+                elif "System" in file_name:
+                    # System data
+                    attrs = parse_attributes([data], [tr_data], ['gameTitle'])
+                    attrs |= parse_array_attributes(
+                        data, tr_data,
+                        ['armorTypes', 'elements', 'equipTypes',
+                         'skillTypes', 'weaponTypes']
+                    )
+                    attrs |= parse_array_attributes(data['terms'], tr_data.get(
+                        'terms', {}), ['basic', 'commands', 'params'])
+                    attrs |= parse_array_attributes(data['terms']['messages'], tr_data.get(
+                        'terms', {}).get('messages', {}), dump_all=True)
+                elif "Troops" in file_name:
+                    # Troop data
+                    strs, attrs = parse_events_list(data, tr_data, False, stop_words, merge_lines, global_names)
+                elif "Events" in file_name:
+                    # Event data
+                    strs, attrs = parse_events_list(data, tr_data, no_rare_codes, stop_words, merge_lines, global_names)
+                elif MAP_FILE_RE.search(file_name):
+                    # Map data
+                    attrs = {data['displayName']: tr_data.get('displayName', '')}
+                    strs, attrs1 = parse_map_events(data, tr_data, no_rare_codes, stop_words, merge_lines, global_names)
+                    attrs |= attrs1
+
+                file_result = FileResult()
+                if strs:
+                    file_result.strings, file_result.tags = reconcile_strings(file_name, strs)
+                if attrs:
+                    file_result.attributes = reconcile_attributes(file_name, attrs)
+                if file_result.strings or file_result.attributes:
+                    yield file_name, file_result
+
+def extract_game(config):
+    """ Extracts strings, attributes and replacement tags of all data files into memory """
+    return ExtractResult(dict(extract_files(config)))
+
+def write_csv_files(files, output_folder, tags_filename=None):
+    """ Writes (file name, FileResult) pairs as `_strings` and `_attributes` CSV files
+        as they come and then the replacement tags; returns the number of written files.
+    """
+    string_tags = {}
+    count = 0
+    for file_name, file_result in files:
+        count += 1
+        string_tags.update(file_result.tags)
+        if file_result.strings:
+            csv_path = os.path.join(output_folder, os.path.splitext(file_name)[0] + '_strings.csv')
+            write_csv_list(csv_path, file_result.strings)
+            print(f" Created {os.path.relpath(csv_path)} with {len(file_result.strings)} strings")
+        if file_result.attributes:
+            csv_path = os.path.join(output_folder, os.path.splitext(file_name)[0] + '_attributes.csv')
+            write_csv_list(csv_path, file_result.attributes)
+            print(f" Created {os.path.relpath(csv_path)} with {len(file_result.attributes)} attributes")
+
+    if tags_filename and len(string_tags) > 0:
+        with open(tags_filename, 'w', newline='', encoding=CSV_ENCODING) as f:
             writer = csv.writer(f, DIALECT_TRANSLATION)
             # sort tags by length and move tab&space tags first
             string_tags = list(string_tags.items())
             string_tags.sort(key=lambda l: (bool(re.search(r"\t| {2,}", l[0])), len(l[0])), reverse=True)
             for line in string_tags:
                 writer.writerow(line)
-            print(f"Written replacement tags to {os.path.relpath(TAGS_FILENAME)}")
+            print(f"Written replacement tags to {os.path.relpath(tags_filename)}")
+    return count
 
+def create_csv_files(input_folder, output_folder, no_rare_codes, stop_words,
+                     merge_lines, translation_folder, find_changed_sources, tags_filename=TAGS_FILENAME, wrap=None):
+    config = ExtractConfig(input_folder, output_folder, translation_folder, no_rare_codes,
+                           stop_words, merge_lines, find_changed_sources, tags_filename, wrap)
+    write_csv_files(extract_files(config), output_folder, tags_filename)
 
-def main():
-    parser = argparse.ArgumentParser(
-        description='Tool to extract text and attributes for translation from RPGMaker MV/MZ JSON data files.')
-    parser.add_argument('-i', '--input-folder', default=(
-                        '.\\data' if MZ_MODE else '.\\www\\data'),
-                        help='folder containing RPG Maker MV JSON data files.')
-    parser.add_argument('-o', '--output-folder', default=(
-                        '.\\data' if MZ_MODE else '.\\www\\data'),
-                        help='folder to save the translation CSV files.')
+
+# combined dictionary
+
+MERGE_CHUNK_ROWS = 50000 # rows sorted in memory at once, the rest is spilled to temporary files
+TRANSLATION_CSV_RE = re.compile(r'^(?P<name>.+?)(?P<lang>_[a-z]{2})?_(?:strings|attributes)\.csv$')
+NEWLINE_ESCAPE_RE = re.compile(r'\n|\\(?=[\\n\n])')
+NEWLINE_UNESCAPE_RE = re.compile(r'\\([\\n])')
+
+def escape_newlines(text):
+    r""" Escapes newlines as `\n` for the combined file, doubling only the backslashes
+        that could be misread, so `\C[1]` stays as is and `\n[1]` becomes `\\n[1]`.
+
+    >>> escape_newlines('line one\n[Note] two'), escape_newlines('\\n<Harold>HI')
+    ('line one\\n[Note] two', '\\\\n<Harold>HI')
+    >>> all(unescape_newlines(escape_newlines(t)) == t for t in (
+    ...     'line one\n[Note] two', '\\n<Harold>HI', '\\C[2]a\\', '\\\n', '\\\\n'))
+    True
+    """
+    return NEWLINE_ESCAPE_RE.sub(lambda m: '\\n' if m.group(0) == '\n' else '\\\\', text)
+
+def unescape_newlines(text):
+    r""" Reverses escape_newlines(): `\n` is a newline, `\\` a backslash, other `\` are kept """
+    return NEWLINE_UNESCAPE_RE.sub(lambda m: '\n' if m.group(1) == 'n' else '\\', text)
+
+def normalize_combined_row(row):
+    r""" Converts a legacy two-column combined file row, where only `\n` is escaped,
+        to the escaping of escape_newlines(); rows with the third column `combine`
+        writes are already in it.
+
+    >>> normalize_combined_row([r'\\C[1]', r'one\ntwo'])
+    ['\\\\\\C[1]', 'one\\ntwo']
+    """
+    if len(row) > 2: return row
+    return [escape_newlines(col.replace('\\n', '\n')) for col in row]
+
+def spill_run(rows):
+    run = tempfile.TemporaryFile('w+', newline='', encoding='utf-8')
+    csv.writer(run, dialect=DIALECT_TRANSLATION).writerows(rows)
+    run.seek(0)
+    return run
+
+def external_sort(rows, key, chunk_rows=MERGE_CHUNK_ROWS):
+    """ Sorts rows of strings with at most chunk_rows of them in memory:
+        sorted chunks are spilled to temporary files and lazily k-way merged.
+    """
+    runs, chunk = [], []
+    try:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                chunk.sort(key=key)
+                runs.append(spill_run(chunk))
+                chunk = []
+        chunk.sort(key=key)
+        if not runs:
+            yield from chunk
+            return
+        runs.append(spill_run(chunk))
+        chunk = []
+        yield from heapq.merge(*(csv.reader(run, dialect=DIALECT_TRANSLATION) for run in runs), key=key)
+    finally:
+        for run in runs:
+            run.close()
+
+def translation_csv_files(folder, lang=''):
+    """ Lists `_strings` and `_attributes` CSV files of the language in a stable order """
+    file_names = []
+    for file_name in sorted(os.listdir(folder)):
+        m = TRANSLATION_CSV_RE.match(file_name)
+        if m and (m.group('lang') or '') == lang:
+            file_names.append(file_name)
+    return file_names
+
+def iter_csv_file(file_path):
+    with open(file_path, 'r', newline='', encoding=CSV_ENCODING) as f:
+        yield from csv.reader(preprocess_in(f, USE_CR_REPLACER), dialect=DIALECT_TRANSLATION)
+
+def is_translation_row(row):
+    return len(row) > 1 and row[0] and not row[0].startswith('//')
+
+def combine_csv_files(folder, lang='', keep_untranslated=False, chunk_rows=MERGE_CHUNK_ROWS):
+    """ Merges per-file CSVs into a deduplicated `_combined{lang}.csv` sorted by source;
+        translated rows and earlier files win when a source repeats, other translations
+        of it are reported as conflicts. The third column keeps the combined translation
+        so `split` can tell which rows were edited. Returns the row count.
+    """
+    file_names = translation_csv_files(folder, lang)
+
+    def rows():
+        for file_no, file_name in enumerate(file_names):
+            for row_no, row in enumerate(iter_csv_file(os.path.join(folder, file_name))):
+                if not is_translation_row(row): continue
+                if not row[1] and not keep_untranslated: continue
+                yield [escape_newlines(row[0]), escape_newlines(row[1]), str(file_no), str(row_no)]
+
+    combined_path = os.path.join(folder, f'_combined{lang}.csv')
+    count = conflicts = 0
+    last_source = kept = None
+    with open(combined_path + '.tmp', 'w', newline='', encoding=CSV_ENCODING) as f:
+        writer = csv.writer(f, dialect=DIALECT_TRANSLATION)
+        for row in external_sort(rows(), lambda r: (r[0], not r[1], int(r[2]), int(r[3])), chunk_rows):
+            if row[0] == last_source:
+                if row[1] and row[1] != kept[1]:
+                    conflicts += 1
+                    print(f" Conflict: {row[0]} → {row[1]} in {file_names[int(row[2])]}, "
+                          f"kept {kept[1]} from {file_names[int(kept[2])]}")
+                continue
+            last_source, kept = row[0], row
+            writer.writerow([row[0], row[1], row[1]])
+            count += 1
+    os.replace(combined_path + '.tmp', combined_path)
+    if conflicts:
+        print(f"Found {conflicts} conflicting translations; edit their rows to apply one everywhere")
+    return count
+
+def split_combined_file(folder, lang='', chunk_rows=MERGE_CHUNK_ROWS):
+    """ Writes edited non-empty translations of `_combined{lang}.csv` back into the
+        per-file CSVs by merge-joining both sides sorted by source. A row counts as edited
+        if its translation differs from the third column written by `combine` (or there is
+        none); applied rows are marked as unedited again. Returns the number of changed rows.
+    """
+    combined_path = os.path.join(folder, f'_combined{lang}.csv')
+    file_names = translation_csv_files(folder, lang)
+
+    def combined_rows():
+        for row_no, row in enumerate(iter_csv_file(combined_path)):
+            if is_translation_row(row) and row[1] and (len(row) < 3 or row[1] != row[2]):
+                row = normalize_combined_row(row)
+                yield [row[0], row[1], str(row_no)]
+
+    def file_rows():
+        for file_no, file_name in enumerate(file_names):
+            for row_no, row in enumerate(iter_csv_file(os.path.join(folder, file_name))):
+                if is_translation_row(row):
+                    yield [escape_newlines(row[0]), escape_newlines(row[1]), str(file_no), str(row_no)]
+
+    def updates():
+        translations = external_sort(combined_rows(), lambda r: (r[0], int(r[2])), chunk_rows)
+        current = next(translations, None)
+        for row in external_sort(file_rows(), lambda r: (r[0], int(r[2]), int(r[3])), chunk_rows):
+            while current is not None and current[0] < row[0]:
+                current = next(translations, None)
+            if current is None:
+                break
+            if current[0] == row[0] and current[1] != row[1]:
+                yield [row[2], row[3], unescape_newlines(current[1])]
+
+    sorted_updates = external_sort(updates(), lambda r: (int(r[0]), int(r[1])), chunk_rows)
+    update = next(sorted_updates, None)
+    changed = 0
+    for file_no, file_name in enumerate(file_names):
+        if update is None: break
+        if int(update[0]) != file_no: continue
+        csv_path = os.path.join(folder, file_name)
+        with open(csv_path + '.tmp', 'w', newline='', encoding=CSV_ENCODING) as f:
+            writer = csv.writer(f, dialect=DIALECT_TRANSLATION)
+            for row_no, row in enumerate(iter_csv_file(csv_path)):
+                if update is not None and int(update[0]) == file_no and int(update[1]) == row_no:
+                    row[1] = update[2]
+                    update = next(sorted_updates, None)
+                    changed += 1
+                writer.writerows(preprocess_out([row], USE_CR_REPLACER))
+        os.replace(csv_path + '.tmp', csv_path)
+        print(f" Updated {os.path.relpath(csv_path)}")
+
+    if changed:
+        with open(combined_path + '.tmp', 'w', newline='', encoding=CSV_ENCODING) as f:
+            writer = csv.writer(f, dialect=DIALECT_TRANSLATION)
+            for row in iter_csv_file(combined_path):
+                if is_translation_row(row) and row[1]:
+                    row = normalize_combined_row(row)
+                    row = [row[0], row[1], row[1]] + row[3:]
+                writer.writerows(preprocess_out([row], USE_CR_REPLACER))
+        os.replace(combined_path + '.tmp', combined_path)
+    return changed
+
+
+# command line
+
+def default_data_folder():
+    return os.path.join('.', 'data') if MZ_MODE else os.path.join('.', 'www', 'data')
+
+def find_data_folder(game_root):
+    """ Returns the first existing data folder of an MV, MZ or packed game """
+    for folder in DATA_FOLDERS:
+        path = os.path.join(game_root, folder)
+        with DataFolder(path) as data_folder:
+            if data_folder.exists():
+                return path
+    return None
+
+def game_config(game_root, options):
+    """ Makes the extraction config for a game root from the batch command line options """
+    input_folder = find_data_folder(game_root)
+    if input_folder is None:
+        raise FileNotFoundError(f"no data folder found in {game_root}")
+    archive, member = split_archive_path(input_folder)
+    relative_folder = os.path.relpath(input_folder, game_root) if archive is None else os.path.normpath(member)
+    return ExtractConfig(
+        input_folder,
+        output_folder=input_folder if archive is None else os.path.join(game_root, relative_folder),
+        translations_folder=os.path.join(game_root, COMPARE_FOLDER, relative_folder),
+        no_rare_codes=not options.rare_codes,
+        stop_words=[w.strip() for w in options.stop_words.split(',') if w] if options.stop_words else [],
+        merge_lines=not options.preserve_lines,
+        find_changed_sources=TRY_FIND_SIMILAR or options.changed,
+        tags_filename=os.path.join(game_root, TAGS_FILENAME),
+        wrap=wrap_config(options)
+    )
+
+def process_game(game_root, options):
+    config = game_config(game_root, options)
+    if not os.path.exists(config.output_folder):
+        os.makedirs(config.output_folder)
+    return write_csv_files(extract_files(config), config.output_folder, config.tags_filename)
+
+def add_extract_arguments(parser):
     parser.add_argument('-r', '--rare-codes', action='store_true',
                         help='enable rarely used codes (pollutes texts if unused).')
     parser.add_argument('-c', '--changed', action='store_true',
@@ -735,19 +1238,138 @@ def main():
                         help='comma separated list of exclusion words for text in scripts.')
     parser.add_argument('-p', '--preserve-lines', action='store_true',
                         help='preserve multi-line dialogues as single lines.')
-    COMPARE_DEFAULT = '.\\to_compare\\data' if MZ_MODE else '.\\to_compare\\www\\data'
+    parser.add_argument('-w', '--wrap', action='store_true',
+                        help='pre-wrap 401/405 translations so the plugin\'s `Enable Wordwrap` can be turned off.')
+    parser.add_argument('--wrap-language', default='',
+                        help='language code of the character width table used for wrapping (default: \'\').')
+    parser.add_argument('--wrap-widths',
+                        help='JSON file with {"<language code>": {"default": px, "wide": px, "<char>": px}} widths.')
+    parser.add_argument('--wrap-width', type=int, default=WRAP_WINDOW_WIDTH,
+                        help=f'message window contents width (default: {WRAP_WINDOW_WIDTH}, 784 for MZ).')
+    parser.add_argument('--wrap-margin', type=int, default=WRAP_TEXT_MARGIN,
+                        help=f'plugin\'s `Text Margin` (default: {WRAP_TEXT_MARGIN}).')
+    parser.add_argument('--wrap-face-offset', type=int, default=WRAP_FACE_OFFSET,
+                        help=f'text start with a face image (default: {WRAP_FACE_OFFSET}, 164 for MZ).')
+    parser.add_argument('--wrap-ignored', default=WRAP_IGNORED_CHARS,
+                        help='plugin\'s `Ignored Characters` that can\'t start a line.')
+
+def wrap_config(options):
+    if not options.wrap: return None
+    return WrapConfig(options.wrap_language, options.wrap_width, options.wrap_margin,
+                      options.wrap_face_offset, options.wrap_ignored, load_char_widths(options.wrap_widths))
+
+def batch_main(argv):
+    parser = argparse.ArgumentParser(
+        prog=f'{os.path.basename(sys.argv[0])} batch',
+        description='Extract translation CSV files of many games in one process.')
+    parser.add_argument('game_roots', nargs='*',
+                        help='game folders containing www/data, data or package.nw.')
+    parser.add_argument('-l', '--list', dest='list_file',
+                        help='text file with one game folder per line.')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of games processed in parallel (default: 1).')
+    add_extract_arguments(parser)
+    args = parser.parse_args(argv)
+
+    game_roots = list(args.game_roots)
+    if args.list_file:
+        with open(args.list_file, 'r', encoding=CSV_ENCODING) as f:
+            game_roots += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    if not game_roots:
+        parser.error('no game folders specified')
+
+    failed = 0
+    if args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            futures = [(root, executor.submit(process_game, root, args)) for root in game_roots]
+            for root, future in futures:
+                try:
+                    print(f"{root}: {future.result()} files")
+                except Exception as e:
+                    failed += 1
+                    print(f"{root}: failed: {e}")
+    else:
+        for root in game_roots:
+            try:
+                print(f"{root}: {process_game(root, args)} files")
+            except Exception as e:
+                failed += 1
+                print(f"{root}: failed: {e}")
+    print(f'Processed {len(game_roots) - failed} of {len(game_roots)} games')
+    return 1 if failed else 0
+
+def combine_main(argv):
+    parser = argparse.ArgumentParser(
+        prog=f'{os.path.basename(sys.argv[0])} combine',
+        description='Build a deduplicated _combined[_languagecode].csv from per-file CSVs.')
+    parser.add_argument('-d', '--folder', default=default_data_folder(),
+                        help='folder with the _strings/_attributes CSV files.')
+    parser.add_argument('-l', '--language', default='',
+                        help='language code of the CSV files like _jp (default: \'\').')
+    parser.add_argument('-a', '--all', action='store_true',
+                        help='keep untranslated rows too (the plugin will use their empty translations).')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.folder):
+        parser.error(f'folder {args.folder} not found')
+    count = combine_csv_files(args.folder, args.language, args.all)
+    print(f"Written {count} rows to {os.path.join(args.folder, f'_combined{args.language}.csv')}")
+
+def split_main(argv):
+    parser = argparse.ArgumentParser(
+        prog=f'{os.path.basename(sys.argv[0])} split',
+        description='Push edited translations from _combined[_languagecode].csv back into per-file CSVs.')
+    parser.add_argument('-d', '--folder', default=default_data_folder(),
+                        help='folder with the _combined and _strings/_attributes CSV files.')
+    parser.add_argument('-l', '--language', default='',
+                        help='language code of the CSV files like _jp (default: \'\').')
+    args = parser.parse_args(argv)
+
+    combined_path = os.path.join(args.folder, f'_combined{args.language}.csv')
+    if not os.path.isfile(combined_path):
+        parser.error(f'{combined_path} not found')
+    print(f"Updated {split_combined_file(args.folder, args.language)} translations")
+
+COMMANDS = {
+    'batch': batch_main,
+    'combine': combine_main,
+    'split': split_main,
+}
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+
+    data_default = default_data_folder()
+    parser = argparse.ArgumentParser(
+        description='Tool to extract text and attributes for translation from RPGMaker MV/MZ JSON data files.',
+        epilog=f"Other commands: {', '.join(COMMANDS)} (see `<command> -h`).")
+    parser.add_argument('-i', '--input-folder', default=data_default,
+                        help='folder containing RPG Maker MV JSON data files; can be inside a zip archive (e.g. package.nw/www/data).')
+    parser.add_argument('-o', '--output-folder', default=data_default,
+                        help='folder to save the translation CSV files.')
+    add_extract_arguments(parser)
+    COMPARE_DEFAULT = os.path.join('.', COMPARE_FOLDER, 'data') if MZ_MODE else os.path.join('.', COMPARE_FOLDER, 'www', 'data')
     parser.add_argument('-t', '--translations-folder', default=COMPARE_DEFAULT,
-                        help=f'folder containing translated JSON data files (default: {COMPARE_DEFAULT}).')
+                        help=f'folder containing translated JSON data files, can be inside a zip archive (default: {COMPARE_DEFAULT}).')
+
+    args = parser.parse_args(argv)
 
-    args = parser.parse_args()
+    if split_archive_path(args.output_folder)[0]:
+        parser.error(f'output folder {args.output_folder} must not be inside an archive')
+    with DataFolder(args.input_folder) as input_data:
+        if not input_data.exists():
+            parser.error(f'input folder {args.input_folder} not found')
 
     if not os.path.exists(args.output_folder):
         os.makedirs(args.output_folder)
 
     stop_words = [w.strip() for w in args.stop_words.split(',') if w] if args.stop_words else []
     create_csv_files(args.input_folder, args.output_folder, not args.rare_codes, stop_words,
-                     not args.preserve_lines, args.translations_folder, TRY_FIND_SIMILAR or args.changed)
+                     not args.preserve_lines, args.translations_folder, TRY_FIND_SIMILAR or args.changed,
+                     wrap=wrap_config(args))
     print(f'Translation files have been created in {args.output_folder}')
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())